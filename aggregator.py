@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Çoklu Host Toplayıcı
+Her makinede çalışan ajanlar SystemMonitor örneklerini toplu halde
+merkezi toplayıcıya gönderir; toplayıcı hepsini host bazında tek
+veritabanına yazar.
+
+Kullanım:
+    python3 aggregator.py serve --listen 0.0.0.0:9555 --db system_monitor.db
+    python3 aggregator.py agent --connect merkez:9555
+    python3 aggregator.py agent --connect /tmp/system_monitor.sock
+
+Çerçeve biçimi (ağ bayt sırası):
+    [uzunluk: uint32][tip: uint8][gövde]
+    Paket (tip 1): [host uzunluğu: uint16][host][sıra no: uint64]
+                   [kayıt sayısı: uint32]
+                   + her kayıt için [zaman: float64][6 x float32]
+    Onay  (tip 2): [yazılan kayıt sayısı: uint32]
+"""
+
+import argparse
+import math
+import os
+import queue
+import socket
+import socketserver
+import sqlite3
+import struct
+import threading
+import time
+from datetime import datetime, timezone
+
+from monitor_core import PerformanceDatabase, SystemMonitor
+
+FRAME_HEADER = struct.Struct('!I')
+FRAME_TYPE = struct.Struct('!B')
+HOST_HEADER = struct.Struct('!H')
+SEQ = struct.Struct('!Q')
+COUNT = struct.Struct('!I')
+SAMPLE = struct.Struct('!d6f')
+
+FRAME_BATCH = 1
+FRAME_ACK = 2
+
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+# datetime'ın gösterebildiği en son an (9999-12-31)
+MAX_TIMESTAMP = 253402300799.0
+DEFAULT_PORT = 9555
+
+
+class ProtocolError(Exception):
+    """Geçersiz veya bozuk çerçeve"""
+
+
+def parse_address(address):
+    """'host:port' veya Unix soket yolunu (family, adres) olarak çöz"""
+    if '/' in address:
+        return socket.AF_UNIX, address
+    host, _, port = address.rpartition(':')
+    if not host:
+        host, port = port, DEFAULT_PORT
+    return socket.AF_INET, (host, int(port))
+
+
+def encode_frame(frame_type, body):
+    """Gövdeyi uzunluk önekli çerçeveye sar"""
+    payload = FRAME_TYPE.pack(frame_type) + body
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+def encode_batch(host, seq, samples):
+    """(zaman, cpu, ram, net_gönder, net_al, disk_oku, disk_yaz) listesini paketle"""
+    host_bytes = host.encode('utf-8')
+    parts = [HOST_HEADER.pack(len(host_bytes)), host_bytes,
+             SEQ.pack(seq), COUNT.pack(len(samples))]
+    parts.extend(SAMPLE.pack(*sample) for sample in samples)
+    return encode_frame(FRAME_BATCH, b''.join(parts))
+
+
+def decode_batch(body):
+    """Paket gövdesini (host, sıra no, örnek listesi) olarak çöz"""
+    try:
+        (host_len,) = HOST_HEADER.unpack_from(body, 0)
+        offset = HOST_HEADER.size
+        host = body[offset:offset + host_len].decode('utf-8')
+        offset += host_len
+        (seq,) = SEQ.unpack_from(body, offset)
+        offset += SEQ.size
+        (count,) = COUNT.unpack_from(body, offset)
+        offset += COUNT.size
+    except (struct.error, UnicodeDecodeError) as e:
+        raise ProtocolError(f"Geçersiz paket başlığı: {e}")
+    if len(body) - offset != count * SAMPLE.size:
+        raise ProtocolError("Paket boyutu kayıt sayısıyla uyuşmuyor")
+    samples = list(SAMPLE.iter_unpack(body[offset:]))
+    for sample in samples:
+        if not all(math.isfinite(value) for value in sample):
+            raise ProtocolError("Kayıtta sonlu olmayan değer var")
+        if not 0 <= sample[0] <= MAX_TIMESTAMP:
+            raise ProtocolError(f"Geçersiz zaman damgası: {sample[0]}")
+    return host, seq, samples
+
+
+def recv_exact(sock, size):
+    """Soketten tam olarak size bayt oku"""
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise ConnectionError("Bağlantı karşı taraf tarafından kapatıldı")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def read_frame(sock):
+    """Bir çerçeve oku, (tip, gövde) döndür"""
+    (length,) = FRAME_HEADER.unpack(recv_exact(sock, FRAME_HEADER.size))
+    if length < FRAME_TYPE.size or length > MAX_FRAME_SIZE:
+        raise ProtocolError(f"Geçersiz çerçeve uzunluğu: {length}")
+    payload = recv_exact(sock, length)
+    return payload[0], payload[FRAME_TYPE.size:]
+
+
+class _PendingBatch:
+    """Yazıcı kuyruğunda bekleyen, onay bekleyen kayıtlar"""
+
+    def __init__(self, host, seq, rows):
+        self.host = host
+        self.seq = seq
+        self.rows = rows
+        self.done = threading.Event()
+        self.written = None
+
+
+class _AgentHandler(socketserver.BaseRequestHandler):
+    """Tek bir ajan bağlantısını işler"""
+
+    def setup(self):
+        self.server.aggregator.add_connection(self.request)
+        # stop() bağlantıları kapattıktan sonra kabul edilmiş olabilir
+        if self.server.stopping.is_set():
+            self.request.shutdown(socket.SHUT_RDWR)
+
+    def finish(self):
+        self.server.aggregator.remove_connection(self.request)
+
+    def handle(self):
+        while True:
+            try:
+                frame_type, body = read_frame(self.request)
+            except (ConnectionError, OSError):
+                return
+            except ProtocolError as e:
+                print(f"❌ Protokol hatası: {e}")
+                return
+            if frame_type != FRAME_BATCH:
+                print(f"❌ Beklenmeyen çerçeve tipi: {frame_type}")
+                return
+            try:
+                host, seq, samples = decode_batch(body)
+            except ProtocolError as e:
+                print(f"❌ Protokol hatası: {e}")
+                return
+            # Kuyruk doluysa burada bekler; onay gecikir ve ajan yavaşlar
+            written = self.server.aggregator.submit(self.server, host, seq, samples)
+            if written is None:
+                return
+            try:
+                self.request.sendall(encode_frame(FRAME_ACK, COUNT.pack(written)))
+            except OSError:
+                return
+
+
+class _ThreadingTCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class _ThreadingUnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class AggregatorServer:
+    """Ajanlardan gelen paketleri alır ve toplu halde veritabanına yazar"""
+
+    def __init__(self, address, db_path="system_monitor.db",
+                 queue_size=64, max_rows_per_commit=5000):
+        self.db = PerformanceDatabase(db_path)
+        self.family, self.address = parse_address(address)
+        self.max_rows_per_commit = max_rows_per_commit
+        self.queue_size = queue_size
+        self.server = None
+        self.threads = []
+        self.connections = set()
+        self.connections_lock = threading.Lock()
+
+    @property
+    def server_address(self):
+        """Dinlenen gerçek adres (port 0 verildiyse atanan port dahil)"""
+        return self.server.server_address
+
+    def start(self):
+        """Dinlemeye ve yazıcı iş parçacığına başla"""
+        if self.family == socket.AF_UNIX:
+            if os.path.exists(self.address):
+                os.unlink(self.address)
+            server = _ThreadingUnixServer(self.address, _AgentHandler)
+        else:
+            server = _ThreadingTCPServer(self.address, _AgentHandler)
+        server.aggregator = self
+        # Kuyruk ve durum her çalıştırmaya özeldir; önceki çalıştırmadan
+        # kalan paketler yeni yazıcıya geçmez
+        server.pending = queue.Queue(maxsize=self.queue_size)
+        server.stopping = threading.Event()
+        server.writer = threading.Thread(target=self._writer_loop,
+                                         args=(server.pending,), daemon=True)
+        self.server = server
+
+        self.threads = [
+            server.writer,
+            threading.Thread(target=server.serve_forever, daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        """Sunucuyu ve açık ajan bağlantılarını kapat"""
+        server = self.server
+        if server is None:
+            return
+        server.stopping.set()
+        server.shutdown()
+        server.server_close()
+        # recv'de bekleyen işleyicileri uyandır
+        with self.connections_lock:
+            for sock in self.connections:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        server.pending.put(None)
+        for thread in self.threads:
+            thread.join()
+        if self.family == socket.AF_UNIX and os.path.exists(self.address):
+            os.unlink(self.address)
+        self.server = None
+
+    def add_connection(self, sock):
+        """Açık ajan bağlantısını kaydet"""
+        with self.connections_lock:
+            self.connections.add(sock)
+
+    def remove_connection(self, sock):
+        """Kapanan ajan bağlantısını kayıttan çıkar"""
+        with self.connections_lock:
+            self.connections.discard(sock)
+
+    def submit(self, server, host, seq, samples):
+        """Kayıtları yazıcıya ver ve yazılana kadar bekle
+
+        Yazılan kayıt sayısını, yazılamadıysa None döndürür. Aynı
+        (host, seq) paketi tekrar gelirse (ör. onay zaman aşımına uğrayıp
+        spool'dan yeniden gönderildiyse) yazılmaz ve 0 döner.
+        """
+        rows = [
+            (datetime.fromtimestamp(sample[0], timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),)
+            + tuple(sample[1:])
+            for sample in samples
+        ]
+        if server.stopping.is_set():
+            return None
+        batch = _PendingBatch(host, seq, rows)
+        server.pending.put(batch)
+        # Kapanış sırasında yazılmayacak paketler için sonsuza dek bekleme
+        while not batch.done.wait(0.5):
+            if server.stopping.is_set() and not server.writer.is_alive():
+                return None
+        return batch.written
+
+    def _writer_loop(self, pending):
+        """Kuyruktaki paketleri birleştirip tek işlemde yaz"""
+        stopping = False
+        while not stopping:
+            batch = pending.get()
+            if batch is None:
+                break
+            batches = [batch]
+            row_count = len(batch.rows)
+            # O an bekleyen diğer ajanların paketlerini de aynı işleme kat
+            while row_count < self.max_rows_per_commit:
+                try:
+                    extra = pending.get_nowait()
+                except queue.Empty:
+                    break
+                if extra is None:
+                    stopping = True
+                    break
+                batches.append(extra)
+                row_count += len(extra.rows)
+
+            try:
+                written = self.db.log_agent_batches(
+                    [(item.host, item.seq, item.rows) for item in batches])
+            except sqlite3.Error as e:
+                print(f"❌ Veritabanı hatası: {e}")
+                written = [None] * len(batches)
+            for item, count in zip(batches, written):
+                item.written = count
+                item.done.set()
+
+        # Kapanışta kuyrukta kalanlar yazılmaz; ajanlar onları spool'dan yeniden gönderir
+        while True:
+            try:
+                item = pending.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item.done.set()
+
+
+class MetricsAgent:
+    """SystemMonitor örneklerini toplayıp toplayıcıya gönderir
+
+    Bağlantı yoksa paketler yerel spool veritabanına yazılır ve bağlantı
+    geri geldiğinde sırasıyla gönderilir.
+    """
+
+    def __init__(self, address, host=None, monitor=None, batch_size=12,
+                 spool_path="agent_spool.db", max_spool_batches=10000,
+                 timeout=10.0, ack_timeout=60.0, retry_delay=5.0):
+        self.family, self.address = parse_address(address)
+        self.host = host or socket.gethostname()
+        self.monitor = monitor or SystemMonitor()
+        self.batch_size = batch_size
+        self.spool_path = spool_path
+        self.max_spool_batches = max_spool_batches
+        self.timeout = timeout
+        self.ack_timeout = ack_timeout
+        self.retry_delay = retry_delay
+        self.batch = []
+        # Paket sıra numarası; yeniden başlatmada çakışmaması için
+        # mikro saniye cinsinden başlangıç zamanından başlar
+        self.next_seq = time.time_ns() // 1000
+        self.sock = None
+        self.next_attempt = 0.0
+        self.init_spool()
+
+    def init_spool(self):
+        """Yerel spool tablosunu oluştur"""
+        conn = sqlite3.connect(self.spool_path)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS spool (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                frame BLOB
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def spooled_count(self):
+        """Spool'da bekleyen paket sayısı"""
+        conn = sqlite3.connect(self.spool_path)
+        count = conn.execute('SELECT COUNT(*) FROM spool').fetchone()[0]
+        conn.close()
+        return count
+
+    def sample(self):
+        """Bir örnek al; paket dolduysa gönder"""
+        metrics = self.monitor.get_metrics()
+        self.batch.append((
+            time.time(),
+            metrics['cpu'],
+            metrics['memory'],
+            metrics['net_sent'],
+            metrics['net_recv'],
+            metrics['disk_read'],
+            metrics['disk_write'],
+        ))
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Bekleyen örnekleri gönder, gönderilemezse spool'a yaz"""
+        if self.batch:
+            frame = encode_batch(self.host, self.next_seq, self.batch)
+            self.next_seq += 1
+            self.batch = []
+        else:
+            frame = None
+
+        # Sıralamayı korumak için önce spool'daki eski paketler gönderilir
+        if self.drain_spool() and frame is not None:
+            if self._send(frame):
+                return True
+        if frame is not None:
+            self._spool(frame)
+        return False
+
+    def drain_spool(self):
+        """Spool'daki paketleri eskiden yeniye gönder; hepsi gittiyse True"""
+        conn = sqlite3.connect(self.spool_path)
+        try:
+            while True:
+                row = conn.execute(
+                    'SELECT id, frame FROM spool ORDER BY id LIMIT 1').fetchone()
+                if row is None:
+                    return True
+                if not self._send(row[1]):
+                    return False
+                conn.execute('DELETE FROM spool WHERE id = ?', (row[0],))
+                conn.commit()
+        finally:
+            conn.close()
+
+    def close(self):
+        """Bağlantıyı kapat"""
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def run(self, interval=5.0, stop_event=None):
+        """Durdurulana kadar her interval saniyede bir örnek al"""
+        stop_event = stop_event or threading.Event()
+        try:
+            while not stop_event.is_set():
+                self.sample()
+                stop_event.wait(interval)
+        finally:
+            self.flush()
+            self.close()
+
+    def _connect(self):
+        if self.sock is not None:
+            return True
+        if time.monotonic() < self.next_attempt:
+            return False
+        sock = socket.socket(self.family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.address)
+        except OSError as e:
+            sock.close()
+            self.next_attempt = time.monotonic() + self.retry_delay
+            print(f"⚠️  Toplayıcıya bağlanılamadı ({e}), veriler spool'a yazılıyor")
+            return False
+        # Onay, toplayıcı kuyruğu doluyken gecikebilir; daha uzun bekle
+        sock.settimeout(self.ack_timeout)
+        self.sock = sock
+        return True
+
+    def _send(self, frame):
+        """Paketi gönder ve onayı bekle; toplayıcı yavaşsa burada yavaşlarız"""
+        if not self._connect():
+            return False
+        try:
+            self.sock.sendall(frame)
+            frame_type, body = read_frame(self.sock)
+            if frame_type != FRAME_ACK or len(body) != COUNT.size:
+                raise ProtocolError("Geçersiz onay çerçevesi")
+            return True
+        except (OSError, ConnectionError, ProtocolError) as e:
+            print(f"⚠️  Toplayıcı bağlantısı koptu ({e}), veriler spool'a yazılıyor")
+            self.close()
+            self.next_attempt = time.monotonic() + self.retry_delay
+            return False
+
+    def _spool(self, frame):
+        conn = sqlite3.connect(self.spool_path)
+        with conn:
+            conn.execute('INSERT INTO spool (frame) VALUES (?)', (frame,))
+            # Spool sınırını aşan en eski paketleri at
+            conn.execute('''
+                DELETE FROM spool WHERE id <= (
+                    SELECT MAX(id) - ? FROM spool
+                )
+            ''', (self.max_spool_batches,))
+        conn.close()
+
+
+def main():
+    """Ana fonksiyon"""
+    parser = argparse.ArgumentParser(description='Sistem Monitörü - Çoklu Host Toplayıcı')
+    subparsers = parser.add_subparsers(dest='mode', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help='Merkezi toplayıcıyı çalıştır')
+    serve_parser.add_argument('--listen', default=f'0.0.0.0:{DEFAULT_PORT}',
+                       help='host:port veya Unix soket yolu')
+    serve_parser.add_argument('--db', default='system_monitor.db', help='Merkezi veritabanı')
+
+    agent_parser = subparsers.add_parser('agent', help='Bu makinede ajan çalıştır')
+    agent_parser.add_argument('--connect', required=True, help='host:port veya Unix soket yolu')
+    agent_parser.add_argument('--host', default=None, help='Gönderilecek host adı')
+    agent_parser.add_argument('--interval', type=float, default=5.0, help='Örnekleme aralığı (sn)')
+    agent_parser.add_argument('--batch', type=int, default=12, help='Paket başına örnek sayısı')
+    agent_parser.add_argument('--spool', default='agent_spool.db', help='Yerel spool veritabanı')
+
+    args = parser.parse_args()
+
+    if args.mode == 'serve':
+        server = AggregatorServer(args.listen, args.db)
+        server.start()
+        print(f"✅ Toplayıcı dinleniyor: {server.server_address}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
+    else:
+        agent = MetricsAgent(args.connect, host=args.host, batch_size=args.batch,
+                             spool_path=args.spool)
+        print(f"✅ Ajan başlatıldı: {agent.host} -> {args.connect}")
+        try:
+            agent.run(args.interval)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
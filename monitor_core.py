@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sistem Monitörü Çekirdeği
+Veri toplama ve veritabanı sınıfları; Qt gerektirmez, bu yüzden
+arayüzsüz makinelerde (ajan/toplayıcı) de kullanılabilir
+"""
+
+import socket
+import psutil
+import sqlite3
+from datetime import datetime, timedelta
+
+
+class PerformanceDatabase:
+    """Performans verilerini SQLite veritabanında saklar"""
+    
+    def __init__(self, db_path="system_monitor.db"):
+        self.db_path = db_path
+        self.init_database()
+    
+    def init_database(self):
+        """Veritabanı ve tabloları oluştur"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS performance_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                cpu_percent REAL,
+                memory_percent REAL,
+                network_sent_mbps REAL,
+                network_recv_mbps REAL,
+                disk_read_mbps REAL,
+                disk_write_mbps REAL,
+                host TEXT
+            )
+        ''')
+        # Eski veritabanlarına host sütununu ekle
+        cursor.execute('PRAGMA table_info(performance_log)')
+        columns = [row[1] for row in cursor.fetchall()]
+        if 'host' not in columns:
+            cursor.execute('ALTER TABLE performance_log ADD COLUMN host TEXT')
+            # Yükseltme öncesi kayıtlar bu makineye aittir
+            cursor.execute('UPDATE performance_log SET host = ? WHERE host IS NULL',
+                           (socket.gethostname(),))
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_performance_log_host_time
+            ON performance_log (host, timestamp)
+        ''')
+        # Toplayıcının yazdığı ajan paketleri; aynı paket iki kez yazılmaz
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS agent_batches (
+                host TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                received_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (host, seq)
+            )
+        ''')
+        conn.commit()
+        conn.close()
+    
+    def log_performance(self, cpu, memory, net_sent, net_recv, disk_read, disk_write):
+        """Performans verilerini kaydet"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO performance_log 
+            (cpu_percent, memory_percent, network_sent_mbps, network_recv_mbps, 
+             disk_read_mbps, disk_write_mbps, host)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (cpu, memory, net_sent, net_recv, disk_read, disk_write,
+              socket.gethostname()))
+        conn.commit()
+        conn.close()
+    
+    def log_agent_batches(self, batches):
+        """Ajan paketlerini tek işlemde ekle, daha önce yazılanları atla
+        
+        batches: (host, seq, rows) demetleri; rows her biri
+                 (timestamp, cpu, memory, net_sent, net_recv,
+                  disk_read, disk_write) olan kayıtlar
+        Her paket için yazılan kayıt sayısını (tekrar ise 0) liste olarak döndürür.
+        """
+        conn = sqlite3.connect(self.db_path)
+        written = []
+        with conn:
+            for host, seq, rows in batches:
+                cursor = conn.execute(
+                    'INSERT OR IGNORE INTO agent_batches (host, seq) VALUES (?, ?)',
+                    (host, seq))
+                if cursor.rowcount == 0:
+                    written.append(0)
+                    continue
+                conn.executemany('''
+                    INSERT INTO performance_log 
+                    (host, timestamp, cpu_percent, memory_percent,
+                     network_sent_mbps, network_recv_mbps,
+                     disk_read_mbps, disk_write_mbps)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', [(host,) + tuple(row) for row in rows])
+                written.append(len(rows))
+        conn.close()
+        return written
+    
+    def get_hosts(self):
+        """Veritabanında kaydı bulunan hostları getir"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT DISTINCT host FROM performance_log
+            WHERE host IS NOT NULL
+            ORDER BY host
+        ''')
+        hosts = [row[0] for row in cursor.fetchall()]
+        conn.close()
+        return hosts
+    
+    def get_history(self, hours=24, host=None):
+        """Belirli bir süre için geçmiş verileri getir (son sütun host)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        since = datetime.now() - timedelta(hours=hours)
+        query = '''
+            SELECT timestamp, cpu_percent, memory_percent, 
+                   network_sent_mbps, network_recv_mbps,
+                   disk_read_mbps, disk_write_mbps, host
+            FROM performance_log 
+            WHERE timestamp >= ?
+        '''
+        params = [since]
+        if host is not None:
+            query += ' AND host = ?'
+            params.append(host)
+        cursor.execute(query + ' ORDER BY timestamp DESC', params)
+        data = cursor.fetchall()
+        conn.close()
+        return data
+    
+    def get_statistics(self, hours=24, host=None):
+        """İstatistiksel özet bilgiler"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        since = datetime.now() - timedelta(hours=hours)
+        query = '''
+            SELECT 
+                AVG(cpu_percent) as avg_cpu,
+                MAX(cpu_percent) as max_cpu,
+                MIN(cpu_percent) as min_cpu,
+                AVG(memory_percent) as avg_mem,
+                MAX(memory_percent) as max_mem,
+                MIN(memory_percent) as min_mem,
+                AVG(network_sent_mbps + network_recv_mbps) as avg_net,
+                MAX(network_sent_mbps + network_recv_mbps) as max_net
+            FROM performance_log 
+            WHERE timestamp >= ?
+        '''
+        params = [since]
+        if host is not None:
+            query += ' AND host = ?'
+            params.append(host)
+        cursor.execute(query, params)
+        stats = cursor.fetchone()
+        conn.close()
+        return stats
+    
+    def cleanup_old_data(self, days=7):
+        """Eski verileri temizle"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        since = datetime.now() - timedelta(days=days)
+        cursor.execute('DELETE FROM performance_log WHERE timestamp < ?', (since,))
+        deleted = cursor.rowcount
+        cursor.execute('DELETE FROM agent_batches WHERE received_at < ?', (since,))
+        conn.commit()
+        conn.close()
+        return deleted
+
+
+class SystemMonitor:
+    """Sistem performans verilerini toplar"""
+    
+    def __init__(self):
+        self.last_net_io = psutil.net_io_counters()
+        self.last_disk_io = psutil.disk_io_counters()
+        self.last_time = datetime.now()
+    
+    def get_metrics(self):
+        """Tüm sistem metriklerini al"""
+        # CPU kullanımı
+        cpu_percent = psutil.cpu_percent(interval=0.1)
+        
+        # RAM kullanımı
+        memory = psutil.virtual_memory()
+        memory_percent = memory.percent
+        
+        # Network kullanımı (Mbps)
+        current_net_io = psutil.net_io_counters()
+        current_time = datetime.now()
+        time_delta = (current_time - self.last_time).total_seconds()
+        
+        if time_delta > 0:
+            bytes_sent = current_net_io.bytes_sent - self.last_net_io.bytes_sent
+            bytes_recv = current_net_io.bytes_recv - self.last_net_io.bytes_recv
+            
+            net_sent_mbps = (bytes_sent * 8) / (time_delta * 1_000_000)  # Mbps
+            net_recv_mbps = (bytes_recv * 8) / (time_delta * 1_000_000)  # Mbps
+        else:
+            net_sent_mbps = 0
+            net_recv_mbps = 0
+        
+        # Disk I/O (MB/s)
+        current_disk_io = psutil.disk_io_counters()
+        if time_delta > 0:
+            disk_read = current_disk_io.read_bytes - self.last_disk_io.read_bytes
+            disk_write = current_disk_io.write_bytes - self.last_disk_io.write_bytes
+            
+            disk_read_mbps = disk_read / (time_delta * 1_000_000)  # MB/s
+            disk_write_mbps = disk_write / (time_delta * 1_000_000)  # MB/s
+        else:
+            disk_read_mbps = 0
+            disk_write_mbps = 0
+        
+        self.last_net_io = current_net_io
+        self.last_disk_io = current_disk_io
+        self.last_time = current_time
+        
+        return {
+            'cpu': cpu_percent,
+            'memory': memory_percent,
+            'net_sent': net_sent_mbps,
+            'net_recv': net_recv_mbps,
+            'disk_read': disk_read_mbps,
+            'disk_write': disk_write_mbps
+        }
@@ -5,12 +5,13 @@ Manuel CSV Rapor Oluşturucu
 Sistem monitörü çalışmıyorken bile rapor almanızı sağlar
 """
 
+import re
 import sqlite3
 import sys
 from datetime import datetime, timedelta
 
-def export_report(hours=24, filename=None):
-    """Belirtilen saat aralığı için CSV raporu oluştur"""
+def export_report(hours=24, filename=None, host=None):
+    """Belirtilen saat aralığı (ve isteğe bağlı host) için CSV raporu oluştur"""
     
     db_path = "system_monitor.db"
     
@@ -20,36 +21,49 @@ def export_report(hours=24, filename=None):
         
         # Veri çek
         since = datetime.now() - timedelta(hours=hours)
-        cursor.execute('''
+        where = 'WHERE timestamp >= ?'
+        params = [since]
+        if host is not None:
+            where += ' AND host = ?'
+            params.append(host)
+        # Eski (host sütunu olmayan) veritabanlarında host boş yazılır
+        cursor.execute('PRAGMA table_info(performance_log)')
+        has_host = 'host' in [row[1] for row in cursor.fetchall()]
+        host_column = 'host' if has_host else 'NULL'
+        cursor.execute(f'''
             SELECT timestamp, cpu_percent, memory_percent, 
                    network_sent_mbps, network_recv_mbps,
-                   disk_read_mbps, disk_write_mbps
+                   disk_read_mbps, disk_write_mbps, {host_column}
             FROM performance_log 
-            WHERE timestamp >= ?
+            {where}
             ORDER BY timestamp DESC
-        ''', (since,))
+        ''', params)
         
         data = cursor.fetchall()
         
         if not data:
-            print(f"❌ Son {hours} saat için veri bulunamadı!")
+            if host is not None:
+                print(f"❌ {host} için son {hours} saatte veri bulunamadı!")
+            else:
+                print(f"❌ Son {hours} saat için veri bulunamadı!")
             return False
         
         # Dosya adı oluştur
         if filename is None:
-            filename = f"monitor_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            host_part = re.sub(r'[^A-Za-z0-9._-]', '_', host) + '_' if host is not None else ''
+            filename = f"monitor_report_{host_part}{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
         
         # CSV yaz
         with open(filename, 'w', encoding='utf-8') as f:
-            f.write('Timestamp,CPU%,RAM%,Net_Send_Mbps,Net_Recv_Mbps,Disk_Read_MBs,Disk_Write_MBs\n')
+            f.write('Timestamp,Host,CPU%,RAM%,Net_Send_Mbps,Net_Recv_Mbps,Disk_Read_MBs,Disk_Write_MBs\n')
             for row in data:
-                f.write(f"{row[0]},{row[1]:.2f},{row[2]:.2f},{row[3]:.2f},{row[4]:.2f},{row[5]:.2f},{row[6]:.2f}\n")
+                f.write(f"{row[0]},{row[7] or ''},{row[1]:.2f},{row[2]:.2f},{row[3]:.2f},{row[4]:.2f},{row[5]:.2f},{row[6]:.2f}\n")
         
         print(f"✅ Rapor oluşturuldu: {filename}")
         print(f"📊 Toplam {len(data)} kayıt")
         
         # İstatistikler
-        cursor.execute('''
+        cursor.execute(f'''
             SELECT 
                 AVG(cpu_percent) as avg_cpu,
                 MAX(cpu_percent) as max_cpu,
@@ -58,8 +72,8 @@ def export_report(hours=24, filename=None):
                 MAX(memory_percent) as max_mem,
                 MIN(memory_percent) as min_mem
             FROM performance_log 
-            WHERE timestamp >= ?
-        ''', (since,))
+            {where}
+        ''', params)
         
         stats = cursor.fetchone()
         
@@ -103,6 +117,20 @@ def show_database_info():
         print(f"   En Eski Kayıt: {oldest}")
         print(f"   En Yeni Kayıt: {newest}")
         
+        # Host bazında kayıt sayıları (merkezi toplayıcı veritabanı)
+        cursor.execute('PRAGMA table_info(performance_log)')
+        if 'host' in [row[1] for row in cursor.fetchall()]:
+            cursor.execute('''
+                SELECT host, COUNT(*) FROM performance_log
+                WHERE host IS NOT NULL
+                GROUP BY host ORDER BY host
+            ''')
+            hosts = cursor.fetchall()
+            if hosts:
+                print("   Hostlar:")
+                for host, count in hosts:
+                    print(f"     {host}: {count} kayıt")
+        
         conn.close()
         
     except Exception as e:
@@ -121,16 +149,21 @@ def main():
             hours = int(sys.argv[1])
         except ValueError:
             print("❌ Geçersiz saat değeri!")
-            print("Kullanım: python3 export_report.py [saat]")
+            print("Kullanım: python3 export_report.py [saat] [host]")
             sys.exit(1)
     else:
         hours = 24
     
+    host = sys.argv[2] if len(sys.argv) > 2 else None
+    
     # Veritabanı bilgilerini göster
     show_database_info()
     
-    print(f"\n📅 Son {hours} saat için rapor oluşturuluyor...")
-    export_report(hours)
+    if host is not None:
+        print(f"\n📅 {host} için son {hours} saatlik rapor oluşturuluyor...")
+    else:
+        print(f"\n📅 Son {hours} saat için rapor oluşturuluyor...")
+    export_report(hours, host=host)
     
     print("\n" + "=" * 50)
 
@@ -5,10 +5,9 @@ Kali Linux Sistem Performans Monitörü
 Sürekli çalışan pop-up monitör ve geçmiş rapor özelliği
 """
 
+import re
 import sys
-import psutil
-import sqlite3
-from datetime import datetime, timedelta
+from datetime import datetime
 from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QLabel, 
                              QPushButton, QMainWindow, QTableWidget, 
                              QTableWidgetItem, QHBoxLayout, QComboBox,
@@ -16,152 +15,7 @@ from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QLabel,
 from PyQt5.QtCore import QTimer, Qt, QPoint
 from PyQt5.QtGui import QFont, QIcon, QColor
 
-class PerformanceDatabase:
-    """Performans verilerini SQLite veritabanında saklar"""
-    
-    def __init__(self, db_path="system_monitor.db"):
-        self.db_path = db_path
-        self.init_database()
-    
-    def init_database(self):
-        """Veritabanı ve tabloları oluştur"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS performance_log (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                cpu_percent REAL,
-                memory_percent REAL,
-                network_sent_mbps REAL,
-                network_recv_mbps REAL,
-                disk_read_mbps REAL,
-                disk_write_mbps REAL
-            )
-        ''')
-        conn.commit()
-        conn.close()
-    
-    def log_performance(self, cpu, memory, net_sent, net_recv, disk_read, disk_write):
-        """Performans verilerini kaydet"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO performance_log 
-            (cpu_percent, memory_percent, network_sent_mbps, network_recv_mbps, 
-             disk_read_mbps, disk_write_mbps)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (cpu, memory, net_sent, net_recv, disk_read, disk_write))
-        conn.commit()
-        conn.close()
-    
-    def get_history(self, hours=24):
-        """Belirli bir süre için geçmiş verileri getir"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        since = datetime.now() - timedelta(hours=hours)
-        cursor.execute('''
-            SELECT timestamp, cpu_percent, memory_percent, 
-                   network_sent_mbps, network_recv_mbps,
-                   disk_read_mbps, disk_write_mbps
-            FROM performance_log 
-            WHERE timestamp >= ?
-            ORDER BY timestamp DESC
-        ''', (since,))
-        data = cursor.fetchall()
-        conn.close()
-        return data
-    
-    def get_statistics(self, hours=24):
-        """İstatistiksel özet bilgiler"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        since = datetime.now() - timedelta(hours=hours)
-        cursor.execute('''
-            SELECT 
-                AVG(cpu_percent) as avg_cpu,
-                MAX(cpu_percent) as max_cpu,
-                MIN(cpu_percent) as min_cpu,
-                AVG(memory_percent) as avg_mem,
-                MAX(memory_percent) as max_mem,
-                MIN(memory_percent) as min_mem,
-                AVG(network_sent_mbps + network_recv_mbps) as avg_net,
-                MAX(network_sent_mbps + network_recv_mbps) as max_net
-            FROM performance_log 
-            WHERE timestamp >= ?
-        ''', (since,))
-        stats = cursor.fetchone()
-        conn.close()
-        return stats
-    
-    def cleanup_old_data(self, days=7):
-        """Eski verileri temizle"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        since = datetime.now() - timedelta(days=days)
-        cursor.execute('DELETE FROM performance_log WHERE timestamp < ?', (since,))
-        conn.commit()
-        deleted = cursor.rowcount
-        conn.close()
-        return deleted
-
-
-class SystemMonitor:
-    """Sistem performans verilerini toplar"""
-    
-    def __init__(self):
-        self.last_net_io = psutil.net_io_counters()
-        self.last_disk_io = psutil.disk_io_counters()
-        self.last_time = datetime.now()
-    
-    def get_metrics(self):
-        """Tüm sistem metriklerini al"""
-        # CPU kullanımı
-        cpu_percent = psutil.cpu_percent(interval=0.1)
-        
-        # RAM kullanımı
-        memory = psutil.virtual_memory()
-        memory_percent = memory.percent
-        
-        # Network kullanımı (Mbps)
-        current_net_io = psutil.net_io_counters()
-        current_time = datetime.now()
-        time_delta = (current_time - self.last_time).total_seconds()
-        
-        if time_delta > 0:
-            bytes_sent = current_net_io.bytes_sent - self.last_net_io.bytes_sent
-            bytes_recv = current_net_io.bytes_recv - self.last_net_io.bytes_recv
-            
-            net_sent_mbps = (bytes_sent * 8) / (time_delta * 1_000_000)  # Mbps
-            net_recv_mbps = (bytes_recv * 8) / (time_delta * 1_000_000)  # Mbps
-        else:
-            net_sent_mbps = 0
-            net_recv_mbps = 0
-        
-        # Disk I/O (MB/s)
-        current_disk_io = psutil.disk_io_counters()
-        if time_delta > 0:
-            disk_read = current_disk_io.read_bytes - self.last_disk_io.read_bytes
-            disk_write = current_disk_io.write_bytes - self.last_disk_io.write_bytes
-            
-            disk_read_mbps = disk_read / (time_delta * 1_000_000)  # MB/s
-            disk_write_mbps = disk_write / (time_delta * 1_000_000)  # MB/s
-        else:
-            disk_read_mbps = 0
-            disk_write_mbps = 0
-        
-        self.last_net_io = current_net_io
-        self.last_disk_io = current_disk_io
-        self.last_time = current_time
-        
-        return {
-            'cpu': cpu_percent,
-            'memory': memory_percent,
-            'net_sent': net_sent_mbps,
-            'net_recv': net_recv_mbps,
-            'disk_read': disk_read_mbps,
-            'disk_write': disk_write_mbps
-        }
+from monitor_core import PerformanceDatabase, SystemMonitor
 
 
 class MonitorWidget(QWidget):
@@ -383,6 +237,12 @@ class HistoryWindow(QWidget):
         self.time_combo.currentIndexChanged.connect(self.load_data)
         control_layout.addWidget(self.time_combo)
         
+        control_layout.addWidget(QLabel('Host:'))
+        self.host_combo = QComboBox()
+        self.host_combo.addItem('Tüm Hostlar', None)
+        self.host_combo.currentIndexChanged.connect(self.load_data)
+        control_layout.addWidget(self.host_combo)
+        
         self.refresh_btn = QPushButton('🔄 Yenile')
         self.refresh_btn.clicked.connect(self.load_data)
         control_layout.addWidget(self.refresh_btn)
@@ -401,8 +261,8 @@ class HistoryWindow(QWidget):
         
         # Tablo
         self.table = QTableWidget()
-        self.table.setColumnCount(7)
-        self.table.setHorizontalHeaderLabels(['Zaman', 'CPU %', 'RAM %', 
+        self.table.setColumnCount(8)
+        self.table.setHorizontalHeaderLabels(['Zaman', 'Host', 'CPU %', 'RAM %', 
                                               'Net Gönder (Mbps)', 'Net Al (Mbps)',
                                               'Disk Okuma (MB/s)', 'Disk Yazma (MB/s)'])
         self.table.horizontalHeader().setStretchLastSection(True)
@@ -451,16 +311,34 @@ class HistoryWindow(QWidget):
         hours_map = {0: 1, 1: 6, 2: 24, 3: 72, 4: 168}
         return hours_map.get(index, 24)
     
+    def get_host_from_selection(self):
+        """Seçili hostu döndür (None: tüm hostlar)"""
+        return self.host_combo.currentData()
+    
+    def refresh_hosts(self):
+        """Host listesini yenile, mevcut seçimi koru"""
+        selected = self.get_host_from_selection()
+        self.host_combo.blockSignals(True)
+        self.host_combo.clear()
+        self.host_combo.addItem('Tüm Hostlar', None)
+        for host in self.db.get_hosts():
+            self.host_combo.addItem(host, host)
+        index = self.host_combo.findData(selected)
+        self.host_combo.setCurrentIndex(index if index >= 0 else 0)
+        self.host_combo.blockSignals(False)
+    
     def load_data(self):
         """Verileri yükle"""
+        self.refresh_hosts()
         hours = self.get_hours_from_selection()
-        data = self.db.get_history(hours)
-        stats = self.db.get_statistics(hours)
+        host = self.get_host_from_selection()
+        data = self.db.get_history(hours, host)
+        stats = self.db.get_statistics(hours, host)
         
         # İstatistikleri göster
         if stats and stats[0] is not None:
             stats_text = f"""
-            <b>İstatistikler ({self.time_combo.currentText()}):</b><br>
+            <b>İstatistikler ({self.time_combo.currentText()}, {self.host_combo.currentText()}):</b><br>
             CPU: Ort: {stats[0]:.1f}% | Max: {stats[1]:.1f}% | Min: {stats[2]:.1f}%<br>
             RAM: Ort: {stats[3]:.1f}% | Max: {stats[4]:.1f}% | Min: {stats[5]:.1f}%<br>
             Network: Ort: {stats[6]:.1f} Mbps | Max: {stats[7]:.1f} Mbps
@@ -471,24 +349,28 @@ class HistoryWindow(QWidget):
         self.table.setRowCount(len(data))
         for i, row in enumerate(data):
             self.table.setItem(i, 0, QTableWidgetItem(str(row[0])))
-            self.table.setItem(i, 1, QTableWidgetItem(f"{row[1]:.1f}"))
-            self.table.setItem(i, 2, QTableWidgetItem(f"{row[2]:.1f}"))
-            self.table.setItem(i, 3, QTableWidgetItem(f"{row[3]:.2f}"))
-            self.table.setItem(i, 4, QTableWidgetItem(f"{row[4]:.2f}"))
-            self.table.setItem(i, 5, QTableWidgetItem(f"{row[5]:.2f}"))
-            self.table.setItem(i, 6, QTableWidgetItem(f"{row[6]:.2f}"))
+            self.table.setItem(i, 1, QTableWidgetItem(row[7] or ''))
+            self.table.setItem(i, 2, QTableWidgetItem(f"{row[1]:.1f}"))
+            self.table.setItem(i, 3, QTableWidgetItem(f"{row[2]:.1f}"))
+            self.table.setItem(i, 4, QTableWidgetItem(f"{row[3]:.2f}"))
+            self.table.setItem(i, 5, QTableWidgetItem(f"{row[4]:.2f}"))
+            self.table.setItem(i, 6, QTableWidgetItem(f"{row[5]:.2f}"))
+            self.table.setItem(i, 7, QTableWidgetItem(f"{row[6]:.2f}"))
     
     def export_to_csv(self):
         """CSV dosyasına aktar"""
         hours = self.get_hours_from_selection()
-        data = self.db.get_history(hours)
+        host = self.get_host_from_selection()
+        data = self.db.get_history(hours, host)
         
-        filename = f"system_monitor_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        # Host filtresi varsa dosya adına ekle (dosya adına uygun olmayan karakterler '_')
+        host_part = re.sub(r'[^A-Za-z0-9._-]', '_', host) + '_' if host is not None else ''
+        filename = f"system_monitor_report_{host_part}{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
         
         with open(filename, 'w') as f:
-            f.write('Timestamp,CPU%,RAM%,Net_Send_Mbps,Net_Recv_Mbps,Disk_Read_MBs,Disk_Write_MBs\n')
+            f.write('Timestamp,Host,CPU%,RAM%,Net_Send_Mbps,Net_Recv_Mbps,Disk_Read_MBs,Disk_Write_MBs\n')
             for row in data:
-                f.write(f"{row[0]},{row[1]:.2f},{row[2]:.2f},{row[3]:.2f},{row[4]:.2f},{row[5]:.2f},{row[6]:.2f}\n")
+                f.write(f"{row[0]},{row[7] or ''},{row[1]:.2f},{row[2]:.2f},{row[3]:.2f},{row[4]:.2f},{row[5]:.2f},{row[6]:.2f}\n")
         
         QMessageBox.information(self, 'Başarılı', f'Rapor kaydedildi: {filename}')
 
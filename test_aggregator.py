@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+aggregator.py için localhost üzerinde çoklu ajan testleri
+Çalıştırma: python3 -m pytest -q test_aggregator.py
+"""
+
+import sqlite3
+import socket
+import threading
+import time
+
+import pytest
+
+import aggregator
+from monitor_core import PerformanceDatabase
+
+
+class FakeMonitor:
+    """Her çağrıda CPU değeri bir artan sahte SystemMonitor"""
+
+    def __init__(self):
+        self.count = 0
+
+    def get_metrics(self):
+        self.count += 1
+        return {
+            'cpu': float(self.count),
+            'memory': 50.0,
+            'net_sent': 1.0,
+            'net_recv': 2.0,
+            'disk_read': 3.0,
+            'disk_write': 4.0,
+        }
+
+
+def host_cpu_values(db_path, host):
+    """Bir hostun CPU değerlerini yazılma sırasıyla döndür"""
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(
+        'SELECT cpu_percent FROM performance_log WHERE host = ? ORDER BY id',
+        (host,)).fetchall()
+    conn.close()
+    return [row[0] for row in rows]
+
+
+def make_agent(address, host, tmp_path, **kwargs):
+    kwargs.setdefault('batch_size', 5)
+    kwargs.setdefault('retry_delay', 0)
+    return aggregator.MetricsAgent(address, host=host, monitor=FakeMonitor(),
+                                   spool_path=str(tmp_path / f'spool_{host}.db'),
+                                   **kwargs)
+
+
+@pytest.fixture
+def server(tmp_path):
+    srv = aggregator.AggregatorServer('127.0.0.1:0', str(tmp_path / 'central.db'))
+    srv.start()
+    yield srv
+    srv.stop()
+
+
+def tcp_address(srv):
+    return '%s:%d' % srv.server_address
+
+
+def test_batch_frame_roundtrip():
+    samples = [(1700000000.5, 10.0, 20.0, 1.0, 2.0, 3.0, 4.0)] * 3
+    frame = aggregator.encode_batch('makine', 42, samples)
+    (length,) = aggregator.FRAME_HEADER.unpack_from(frame)
+    assert length == len(frame) - aggregator.FRAME_HEADER.size
+    host, seq, decoded = aggregator.decode_batch(frame[aggregator.FRAME_HEADER.size + 1:])
+    assert (host, seq, decoded) == ('makine', 42, samples)
+
+
+def test_decode_batch_rejects_truncated_body():
+    frame = aggregator.encode_batch('makine', 1, [(0.0,) * 7])
+    with pytest.raises(aggregator.ProtocolError):
+        aggregator.decode_batch(frame[aggregator.FRAME_HEADER.size + 1:-1])
+
+
+@pytest.mark.parametrize('timestamp', [float('nan'), float('inf'), -1.0, 1e20])
+def test_bad_timestamp_is_rejected(server, timestamp):
+    frame = aggregator.encode_batch('kotu', 1, [(timestamp, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0)])
+    with pytest.raises(aggregator.ProtocolError):
+        aggregator.decode_batch(frame[aggregator.FRAME_HEADER.size + 1:])
+
+    with socket.create_connection(server.server_address, timeout=2) as sock:
+        sock.sendall(frame)
+        # Onay yerine bağlantı kapatılmalı
+        with pytest.raises(ConnectionError):
+            aggregator.read_frame(sock)
+    assert server.threads[0].is_alive()
+    assert server.db.get_hosts() == []
+
+
+def test_ack_carries_written_count(server):
+    frame = aggregator.encode_batch('tekrar', 7, [(1700000000.0, 1.0, 2.0, 3.0, 4.0, 5.0, 6.0)] * 3)
+    with socket.create_connection(server.server_address, timeout=2) as sock:
+        acks = []
+        for _ in range(2):
+            sock.sendall(frame)
+            frame_type, body = aggregator.read_frame(sock)
+            assert frame_type == aggregator.FRAME_ACK
+            acks.append(aggregator.COUNT.unpack(body)[0])
+    # İkinci gönderim aynı (host, seq) olduğu için yazılmaz
+    assert acks == [3, 0]
+
+
+def test_several_agents_write_per_host(server, tmp_path):
+    agents = [make_agent(tcp_address(server), f'host{i}', tmp_path) for i in range(4)]
+
+    def work(agent):
+        for _ in range(20):
+            agent.sample()
+        agent.flush()
+        agent.close()
+
+    threads = [threading.Thread(target=work, args=(agent,)) for agent in agents]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    db = PerformanceDatabase(str(tmp_path / 'central.db'))
+    assert db.get_hosts() == ['host0', 'host1', 'host2', 'host3']
+    for i in range(4):
+        history = db.get_history(24, f'host{i}')
+        assert len(history) == 20
+        assert {row[7] for row in history} == {f'host{i}'}
+        assert db.get_statistics(24, f'host{i}')[1] == 20.0
+    assert len(db.get_history(24)) == 80
+    for agent in agents:
+        assert agent.spooled_count() == 0
+
+
+def test_spool_while_down_then_drain_in_order(tmp_path):
+    db_path = str(tmp_path / 'central.db')
+    srv = aggregator.AggregatorServer('127.0.0.1:0', db_path)
+    srv.start()
+    address = tcp_address(srv)
+    agent = make_agent(address, 'spooler', tmp_path, batch_size=2)
+    for _ in range(2):
+        agent.sample()
+    srv.stop()
+
+    for _ in range(6):
+        agent.sample()
+    assert agent.spooled_count() == 3
+
+    srv = aggregator.AggregatorServer(address, db_path)
+    srv.start()
+    try:
+        for _ in range(2):
+            agent.sample()
+        assert agent.spooled_count() == 0
+        assert host_cpu_values(db_path, 'spooler') == [float(i) for i in range(1, 11)]
+    finally:
+        agent.close()
+        srv.stop()
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='Unix soketi yok')
+def test_unix_socket(tmp_path):
+    db_path = str(tmp_path / 'central.db')
+    sock_path = str(tmp_path / 'aggregator.sock')
+    srv = aggregator.AggregatorServer(sock_path, db_path)
+    srv.start()
+    try:
+        agents = [make_agent(sock_path, f'unix{i}', tmp_path, batch_size=3) for i in range(2)]
+        for agent in agents:
+            for _ in range(6):
+                agent.sample()
+            agent.close()
+        for i in range(2):
+            assert len(host_cpu_values(db_path, f'unix{i}')) == 6
+    finally:
+        srv.stop()
+
+
+def test_slow_writer_does_not_duplicate_rows(tmp_path, monkeypatch):
+    original = PerformanceDatabase.log_agent_batches
+
+    def slow_log(self, batches):
+        time.sleep(1.0)
+        return original(self, batches)
+
+    monkeypatch.setattr(PerformanceDatabase, 'log_agent_batches', slow_log)
+
+    db_path = str(tmp_path / 'central.db')
+    srv = aggregator.AggregatorServer('127.0.0.1:0', db_path)
+    srv.start()
+    try:
+        agent = make_agent(tcp_address(srv), 'dup', tmp_path,
+                           batch_size=3, ack_timeout=0.3)
+        for _ in range(3):
+            agent.sample()
+        # Onay zaman aşımına uğradı, paket spool'da
+        assert agent.spooled_count() == 1
+
+        time.sleep(1.2)
+        monkeypatch.setattr(PerformanceDatabase, 'log_agent_batches', original)
+        agent.flush()
+        assert agent.spooled_count() == 0
+        assert host_cpu_values(db_path, 'dup') == [1.0, 2.0, 3.0]
+        agent.close()
+    finally:
+        srv.stop()
+
+
+def test_stop_closes_agent_connections(server, tmp_path):
+    agent = make_agent(tcp_address(server), 'closer', tmp_path, batch_size=1)
+    agent.sample()
+    assert len(server.connections) == 1
+    server.stop()
+    deadline = time.monotonic() + 2
+    while server.connections and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not server.connections
+    agent.close()